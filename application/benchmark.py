@@ -0,0 +1,138 @@
+'''
+Description: Fuzz and benchmark harness for SUSTAIN's input pipeline. It feeds
+random and adversarial prompts of increasing size through every local stage
+(admission, math recognition, local answers, text optimization and token
+counting, without calling the API) and checks that the worst-case time per
+character stays roughly constant, i.e. that latency grows linearly.
+
+Usage: python benchmark.py [--sizes 1000 10000 100000] [--rounds 3] [--max-growth 4]
+'''
+
+import argparse
+import random
+import string
+import sys
+import time
+
+from sustain import InputGuard, SharedResources, TextOptimizer
+
+NUMBER_WORDS = ["one", "two", "three", "twenty", "hundred", "thousand", "million"]
+OPERATOR_WORDS = ["plus", "minus", "times", "divided by", "to the power of", "+", "-", "*", "/", "^"]
+
+
+def random_text(size, rng):
+    """Random printable characters."""
+    return ''.join(rng.choice(string.printable) for _ in range(size))
+
+
+def random_words(size, rng):
+    """Random mix of filler phrases, number words, operators and units."""
+    vocabulary = (TextOptimizer.load_phrases_to_remove() + NUMBER_WORDS + OPERATOR_WORDS
+                  + ["km", "to", "miles", "15%", "of", "days", "ago", "what is", "SUSTAIN"])
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(vocabulary) or "word"
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)[:size]
+
+
+def long_word(size, _rng):
+    """A single word with no whitespace, the worst case for `\\w+` backtracking."""
+    return "a" * size
+
+
+def digit_run(size, _rng):
+    """A single run of digits."""
+    return "9" * size
+
+
+def operator_chain(size, _rng):
+    """A long arithmetic-looking chain of numbers and operators."""
+    return ("1 plus 2 times " * (size // 15 + 1))[:size]
+
+
+def repeated_phrases(size, _rng):
+    """Phrases that all match the removal and contraction tables."""
+    return ("could you kindly tell me what is not " * (size // 37 + 1))[:size]
+
+
+def special_tokens(size, _rng):
+    """Text containing tokenizer special tokens."""
+    return ("<|endoftext|> hello " * (size // 20 + 1))[:size]
+
+
+GENERATORS = [random_text, random_words, long_word, digit_run, operator_chain,
+              repeated_phrases, special_tokens]
+
+
+def run_pipeline(text, guard, math_optimizer, local_router, text_optimizer):
+    """Run every local stage of SUSTAIN.get_response on a prompt."""
+    if guard.check(text) is not None:
+        return
+    if math_optimizer.recognize_math(text):
+        math_optimizer.solve_math(text)
+    local_router.answer(text)
+    optimized = text_optimizer.optimize_batch([text])[0]
+    SharedResources.count_tokens(text)
+    SharedResources.count_tokens(optimized)
+
+
+def benchmark(sizes, rounds, seed=0):
+    """Return {generator name: [(size, worst seconds), ...]} for each input size."""
+    rng = random.Random(seed)
+    guard = InputGuard(max_chars=max(sizes))
+    math_optimizer = SharedResources.math_optimizer()
+    local_router = SharedResources.local_router()
+    text_optimizer = SharedResources.text_optimizer()
+
+    results = {}
+    for generator in GENERATORS:
+        timings = []
+        for size in sizes:
+            worst = 0.0
+            for _ in range(rounds):
+                text = generator(size, rng)
+                start = time.perf_counter()
+                run_pipeline(text, guard, math_optimizer, local_router, text_optimizer)
+                worst = max(worst, time.perf_counter() - start)
+            timings.append((size, worst))
+        results[generator.__name__] = timings
+    return results
+
+
+def main():
+    '''Run the benchmark and exit non-zero if any input class grows super-linearly.'''
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--max-growth", type=float, default=4.0,
+                        help="allowed growth of worst-case time per character from the "
+                             "smallest to the largest size")
+    args = parser.parse_args()
+    sizes = sorted(args.sizes)
+
+    # Warm up shared resources so loading them is not counted
+    run_pipeline("warm up 1 plus 1", InputGuard(), SharedResources.math_optimizer(),
+                 SharedResources.local_router(), SharedResources.text_optimizer())
+
+    failures = []
+    for name, timings in benchmark(sizes, args.rounds).items():
+        per_char = [seconds / size for size, seconds in timings]
+        growth = per_char[-1] / per_char[0] if per_char[0] else 0.0
+        row = "  ".join(f"{size:>8}: {seconds * 1000:8.2f} ms" for size, seconds in timings)
+        status = "OK" if growth <= args.max_growth else "SUPER-LINEAR"
+        print(f"{name:<18} {row}  growth x{growth:.2f} {status}")
+        if status != "OK":
+            failures.append(name)
+
+    if failures:
+        print(f"Worst-case time grew super-linearly for: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,7 +12,7 @@ from tkinter import filedialog, scrolledtext
 
 from dotenv import load_dotenv
 from PIL import Image, ImageTk
-from sustain import SUSTAIN
+from sustain import SUSTAIN, SharedResources
 
 load_dotenv()
 
@@ -164,6 +164,9 @@ class ChatApp:
                 "API key not found. Please set the OPENAI_API_KEY environment variable."
             )
         self.sustain = SUSTAIN(api_key=self.api_key)
+        if os.getenv("SUSTAIN_PREWARM", "").lower() in ("1", "true", "yes"):
+            # Replay frequent prompts in the background so they are served warm
+            SharedResources.prewarmer(self.api_key)
         self.display_settings_message(
             "Welcome to SUSTAIN Chat! Ask me: \"What is SUSTAIN?\" to learn more."
         )
@@ -242,17 +245,8 @@ class ChatApp:
                     text=f"Average token savings: {average_savings:.2f}%. Thank you for going green!")  # pylint: disable=line-too-long
                 return  # Exit early to prevent API call
 
-            # Check if user input is a special command
-            if user_input.strip().lower() == "what is sustain?":
-                response = (
-                    "I am SUSTAIN, an environmentally-friendly, token-optimized AI wrapper designed to reduce compute costs " # pylint: disable=line-too-long
-                    "and increase productivity. I filter out irrelevant words and phrases from prompts and limit responses to " # pylint: disable=line-too-long
-                    "essential outputs, minimizing the number of tokens used."
-                )
-                percentage_saved = 0
-            else:
-                response, percentage_saved = self.sustain.get_response(
-                    user_input)
+            # FAQs such as "What is SUSTAIN?" are answered locally by get_response
+            response, percentage_saved = self.sustain.get_response(user_input)
 
             # Display the response from SUSTAIN
             self.display_message(f"\nSUSTAIN: {response}")
@@ -313,9 +307,9 @@ class ChatApp:
         co2_per_kwh_saved = 0.7
 
         total_tokens_saved = 0
-        for msg in self.message_history:
+        optimized_inputs = self.sustain.text_optimizer.optimize_batch(self.message_history)
+        for msg, optimized_input in zip(self.message_history, optimized_inputs):
             original_tokens = self.sustain.count_tokens(msg)
-            optimized_input = self.sustain.text_optimizer.optimize_text(msg)
             optimized_tokens = self.sustain.count_tokens(optimized_input)
             tokens_saved = original_tokens - optimized_tokens
             total_tokens_saved += tokens_saved
@@ -0,0 +1,367 @@
+"""
+Description: This module contains the local-answer stage used by SUSTAIN to
+answer common queries (FAQs, unit conversions, percentages and date
+arithmetic) without calling the OpenAI API. Prompts are routed through a
+precompiled keyword index, so prompts that match no handler cost only a
+single tokenizing pass and a few dictionary lookups.
+"""
+
+import datetime
+import re
+import threading
+
+SUSTAIN_DESCRIPTION = (
+    "I am SUSTAIN, an environmentally-friendly, token-optimized AI wrapper designed to "
+    "reduce compute costs and increase productivity. I filter out irrelevant words and "
+    "phrases from prompts and limit responses to essential outputs, minimizing the number "
+    "of tokens used."
+)
+
+DEFAULT_FAQ = {
+    "what is sustain": SUSTAIN_DESCRIPTION,
+    "who are you": SUSTAIN_DESCRIPTION,
+    "what is a token": (
+        "A token is a unit of text that the AI processes. Tokens can be as short as one "
+        "character or as long as one word."
+    ),
+}
+
+NUMBER = r'(-?\d+(?:\.\d+)?)'
+
+# Handler patterns must match the whole prompt: an optional leading question
+# phrase, the query itself, then optional closing punctuation. A prompt that
+# merely contains a matching fragment ("learn Python in 30 days") goes to the API.
+QUESTION_PREFIX = (
+    r"^\s*(?:please\s+)?(?:(?:what(?:'s|s|\s+is)|convert|calculate|compute|"
+    r"how\s+(?:much|many)(?:\s+is)?)\s+)?"
+)
+END = r'\s*[?.!]*\s*$'
+
+
+def normalize_prompt(prompt):
+    """Lowercase a prompt and strip punctuation so equivalent questions compare equal."""
+    return ' '.join(re.sub(r"[^\w\s%]", ' ', prompt.lower()).split())
+
+
+def format_number(value):
+    """Format a number without trailing zeros (e.g. 2.50 -> 2.5, 3.0 -> 3)."""
+    text = f"{value:,.4f}".rstrip('0').rstrip('.')
+    return "0" if text == "-0" else text
+
+
+class LocalAnswerHandler:
+    '''Base class for handlers that answer a family of prompts locally.'''
+
+    name = "handler"
+    keywords = frozenset()
+
+    def answer(self, prompt):
+        """Return an answer for the prompt, or None if the handler does not apply."""
+        raise NotImplementedError
+
+
+class FAQHandler(LocalAnswerHandler):
+    '''Answer questions from a configurable FAQ table.'''
+
+    name = "faq"
+
+    def __init__(self, faq=None):
+        table = DEFAULT_FAQ if faq is None else faq
+        self.answers = {normalize_prompt(question): answer for question, answer in table.items()}
+        # Prompts much longer than any question cannot match; skip normalizing them
+        self.max_length = 4 * max((len(question) for question in self.answers), default=0) + 32
+
+    def answer(self, prompt):
+        if len(prompt) > self.max_length:
+            return None
+        return self.answers.get(normalize_prompt(prompt))
+
+
+class UnitConversionHandler(LocalAnswerHandler):
+    '''Convert between common length, mass, volume and temperature units.'''
+
+    name = "unit_conversion"
+
+    # Unit aliases mapped to (dimension, factor to the dimension's base unit)
+    UNITS = {
+        "length": {
+            ("m", "meter", "meters", "metre", "metres"): 1.0,
+            ("km", "kilometer", "kilometers", "kilometre", "kilometres"): 1000.0,
+            ("cm", "centimeter", "centimeters", "centimetre", "centimetres"): 0.01,
+            ("mm", "millimeter", "millimeters", "millimetre", "millimetres"): 0.001,
+            ("mi", "mile", "miles"): 1609.344,
+            ("yd", "yard", "yards"): 0.9144,
+            ("ft", "foot", "feet"): 0.3048,
+            ("inch", "inches"): 0.0254,
+        },
+        "mass": {
+            ("kg", "kilogram", "kilograms", "kilo", "kilos"): 1.0,
+            ("g", "gram", "grams"): 0.001,
+            ("mg", "milligram", "milligrams"): 0.000001,
+            ("lb", "lbs", "pound", "pounds"): 0.45359237,
+            ("oz", "ounce", "ounces"): 0.028349523125,
+            ("st", "stone", "stones"): 6.35029318,
+        },
+        "volume": {
+            ("l", "liter", "liters", "litre", "litres"): 1.0,
+            ("ml", "milliliter", "milliliters", "millilitre", "millilitres"): 0.001,
+            ("gal", "gallon", "gallons"): 3.785411784,
+            ("qt", "quart", "quarts"): 0.946352946,
+            ("pt", "pint", "pints"): 0.473176473,
+            ("cup", "cups"): 0.2365882365,
+        },
+    }
+
+    TEMPERATURES = {
+        "c": "celsius", "celsius": "celsius", "centigrade": "celsius",
+        "f": "fahrenheit", "fahrenheit": "fahrenheit",
+        "k": "kelvin", "kelvin": "kelvin", "kelvins": "kelvin",
+    }
+
+    PATTERN = re.compile(
+        QUESTION_PREFIX + NUMBER
+        + r'\s*(?:degrees?\s+)?([a-z]+)\s+(?:to|in|into|as)\s+(?:degrees?\s+)?([a-z]+)' + END,
+        re.IGNORECASE
+    )
+
+    def __init__(self):
+        self.units = {
+            alias: (dimension, factor)
+            for dimension, table in self.UNITS.items()
+            for aliases, factor in table.items()
+            for alias in aliases
+        }
+        self.keywords = frozenset(self.units) | frozenset(self.TEMPERATURES)
+
+    def answer(self, prompt):
+        match = self.PATTERN.match(prompt)
+        if not match:
+            return None
+        value = float(match.group(1))
+        source, target = match.group(2).lower(), match.group(3).lower()
+
+        if source in self.TEMPERATURES and target in self.TEMPERATURES:
+            result = self.convert_temperature(
+                value, self.TEMPERATURES[source], self.TEMPERATURES[target])
+        elif source in self.units and target in self.units:
+            source_dimension, source_factor = self.units[source]
+            target_dimension, target_factor = self.units[target]
+            if source_dimension != target_dimension:
+                return None
+            result = value * source_factor / target_factor
+        else:
+            return None
+        return f"{format_number(value)} {source} = {format_number(result)} {target}"
+
+    @staticmethod
+    def convert_temperature(value, source, target):
+        """Convert a temperature between celsius, fahrenheit and kelvin."""
+        to_celsius = {
+            "celsius": lambda v: v,
+            "fahrenheit": lambda v: (v - 32) * 5 / 9,
+            "kelvin": lambda v: v - 273.15,
+        }
+        from_celsius = {
+            "celsius": lambda v: v,
+            "fahrenheit": lambda v: v * 9 / 5 + 32,
+            "kelvin": lambda v: v + 273.15,
+        }
+        return from_celsius[target](to_celsius[source](value))
+
+
+class PercentageHandler(LocalAnswerHandler):
+    '''Answer "X% of Y" and "what percent of Y is X" style questions.'''
+
+    name = "percentage"
+    keywords = frozenset({"%", "percent", "percentage"})
+
+    PERCENT_OF = re.compile(
+        QUESTION_PREFIX + NUMBER + r'\s*(?:%|percent)\s+of\s+' + NUMBER + END, re.IGNORECASE)
+    WHAT_PERCENT = re.compile(
+        r'^\s*' + NUMBER + r'\s+(?:is|as)\s+(?:a\s+)?what\s+(?:percent|percentage|%)\s+of\s+'
+        + NUMBER + END,
+        re.IGNORECASE
+    )
+    WHAT_PERCENT_OF = re.compile(
+        r'^\s*what\s+(?:percent|percentage|%)\s+of\s+' + NUMBER + r'\s+is\s+' + NUMBER + END,
+        re.IGNORECASE
+    )
+    WHAT_PERCENT_IS = re.compile(
+        r'^\s*what\s+(?:percent|percentage|%)\s+is\s+' + NUMBER + r'\s+of\s+' + NUMBER + END,
+        re.IGNORECASE
+    )
+
+    def answer(self, prompt):
+        match = self.PERCENT_OF.match(prompt)
+        if match:
+            percent, total = float(match.group(1)), float(match.group(2))
+            return (f"{format_number(percent)}% of {format_number(total)} is "
+                    f"{format_number(percent * total / 100)}")
+
+        for pattern, part_group, total_group in ((self.WHAT_PERCENT, 1, 2),
+                                                 (self.WHAT_PERCENT_IS, 1, 2),
+                                                 (self.WHAT_PERCENT_OF, 2, 1)):
+            match = pattern.match(prompt)
+            if match:
+                part, total = float(match.group(part_group)), float(match.group(total_group))
+                if total == 0:
+                    return None
+                return (f"{format_number(part)} is {format_number(part / total * 100)}% "
+                        f"of {format_number(total)}")
+        return None
+
+
+class DateArithmeticHandler(LocalAnswerHandler):
+    '''Answer relative-date and day-count questions.'''
+
+    name = "date_arithmetic"
+    keywords = frozenset({
+        "day", "days", "week", "weeks", "today", "tomorrow", "yesterday", "date",
+        "ago", "until", "till", "between"
+    })
+
+    DATE = r'(\d{4}-\d{2}-\d{2})'
+    # "what is the date", "what day will it be", "when is", ...
+    DATE_PREFIX = (
+        r"^\s*(?:(?:what(?:'s|s|\s+is)\s+(?:the\s+)?(?:date|day)|"
+        r"what\s+(?:date|day)\s+(?:is\s+it|is|will\s+it\s+be)|when\s+is)\s+)?"
+    )
+    # "days until", "how many days are left until", ...
+    COUNT_PREFIX = r'^\s*(?:how\s+many\s+)?days?\s+(?:are\s+(?:there\s+)?(?:left\s+)?)?'
+    OFFSET = re.compile(
+        DATE_PREFIX + r'(\d+)\s+(days?|weeks?)\s+'
+        r'(from\s+(?:now|today)|ago|later|before\s+today|after\s+today)' + END,
+        re.IGNORECASE
+    )
+    IN_OFFSET = re.compile(DATE_PREFIX + r'in\s+(\d+)\s+(days?|weeks?)' + END, re.IGNORECASE)
+    UNTIL = re.compile(COUNT_PREFIX + r'(?:until|till|to)\s+' + DATE + END, re.IGNORECASE)
+    BETWEEN = re.compile(
+        COUNT_PREFIX + r'between\s+' + DATE + r'\s+and\s+' + DATE + END, re.IGNORECASE)
+    TODAY = re.compile(
+        r"^(?:what(?:'s|\s+is)\s+)?(?:the\s+)?(?:date\s+today|today'?s\s+date|date|"
+        r"what\s+day\s+is\s+(?:it\s+)?today|day\s+is\s+it)\s*\??$",
+        re.IGNORECASE
+    )
+    RELATIVE_DAYS = {"tomorrow": 1, "yesterday": -1}
+    RELATIVE_DAY = re.compile(
+        r"^(?:what(?:'s|\s+is)\s+)?(?:the\s+)?(?:date\s+|day\s+)?(tomorrow|yesterday)\s*\??$",
+        re.IGNORECASE
+    )
+
+    def __init__(self, today=None):
+        self.today = today or datetime.date.today
+
+    def answer(self, prompt):
+        prompt = prompt.strip()
+        today = self.today()
+
+        match = self.BETWEEN.match(prompt)
+        if match:
+            start, end = self.parse_date(match.group(1)), self.parse_date(match.group(2))
+            if start is None or end is None:
+                return None
+            return f"There are {abs((end - start).days)} days between {start} and {end}"
+
+        match = self.UNTIL.match(prompt)
+        if match:
+            target = self.parse_date(match.group(1))
+            if target is None:
+                return None
+            return f"{(target - today).days} days until {target}"
+
+        match = self.OFFSET.match(prompt) or self.IN_OFFSET.match(prompt)
+        if match:
+            direction = match.group(3).lower() if match.lastindex == 3 else "later"
+            try:
+                delta = self.to_timedelta(int(match.group(1)), match.group(2))
+                if direction == "ago" or direction.startswith("before"):
+                    delta = -delta
+                return self.describe(today + delta)
+            except OverflowError:
+                # Beyond the representable date range: let the API answer instead
+                return None
+
+        match = self.RELATIVE_DAY.match(prompt)
+        if match:
+            return self.describe(
+                today + datetime.timedelta(days=self.RELATIVE_DAYS[match.group(1).lower()]))
+
+        if self.TODAY.match(prompt):
+            return self.describe(today)
+        return None
+
+    @staticmethod
+    def parse_date(text):
+        """Parse an ISO date, returning None when it is not a valid calendar date."""
+        try:
+            return datetime.date.fromisoformat(text)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def to_timedelta(amount, unit):
+        """Convert an amount of days or weeks into a timedelta."""
+        if unit.lower().startswith("week"):
+            return datetime.timedelta(weeks=amount)
+        return datetime.timedelta(days=amount)
+
+    @staticmethod
+    def describe(date):
+        """Describe a date as e.g. 'Monday, 19 October 2026'."""
+        return f"{date:%A}, {date.day} {date:%B %Y}"
+
+
+class LocalAnswerRouter:
+    '''Route prompts to local handlers through a precompiled keyword index.'''
+
+    WORD_PATTERN = re.compile(r"[a-z]+|%")
+
+    # Longer prompts are never simple local queries and skip the handlers entirely
+    DEFAULT_MAX_CHARS = 500
+
+    def __init__(self, handlers=None, faq=None, max_chars=DEFAULT_MAX_CHARS):
+        self.max_chars = max_chars
+        self.faq = FAQHandler(faq)
+        if handlers is None:
+            handlers = [UnitConversionHandler(), PercentageHandler(), DateArithmeticHandler()]
+        self.handlers = list(handlers)
+        self.keyword_index = {}
+        for handler in self.handlers:
+            for keyword in handler.keywords:
+                self.keyword_index.setdefault(keyword, []).append(handler)
+        self.hits = {handler.name: 0 for handler in [self.faq] + self.handlers}
+        self._lock = threading.Lock()
+
+    def candidates(self, prompt):
+        """Return the handlers whose keywords appear in the prompt, in registration order."""
+        matched = set()
+        for word in self.WORD_PATTERN.findall(prompt.lower()):
+            handlers = self.keyword_index.get(word)
+            if handlers:
+                matched.update(handlers)
+        return [handler for handler in self.handlers if handler in matched]
+
+    def answer(self, prompt):
+        """Answer the prompt locally, or return None to fall through to the cache and API."""
+        return self.route(prompt)[1]
+
+    def route(self, prompt):
+        """Return (handler name, answer) for a local answer, or (None, None)."""
+        if len(prompt) > self.max_chars:
+            return None, None
+        for handler in [self.faq] + self.candidates(prompt):
+            answer = handler.answer(prompt)
+            if answer is not None:
+                self.record_hit(handler)
+                return handler.name, answer
+        return None, None
+
+    def record_hit(self, handler):
+        """Count a prompt answered by a handler."""
+        with self._lock:
+            self.hits[handler.name] = self.hits.get(handler.name, 0) + 1
+
+    def stats(self):
+        """Return a snapshot of hits per handler."""
+        with self._lock:
+            return dict(self.hits)
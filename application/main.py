@@ -8,10 +8,10 @@ import platform
 import ctypes
 import tkinter as tk
 
-import spacy
 from spacy.cli.download import download
 from chat_gui import ChatApp
 from dotenv import load_dotenv
+from sustain import SharedResources
 
 # Configure logging
 log_file_path = os.path.abspath(os.path.join(
@@ -24,9 +24,7 @@ load_dotenv()
 
 def track_token_length(message):
     '''Track the token length of a message.'''
-    nlp = spacy.load("en_core_web_sm")
-    doc = nlp(message)
-    return len(doc)
+    return len(SharedResources.nlp().make_doc(message))
 
 def main():
     '''Main function to run the chat application.'''
@@ -83,7 +81,7 @@ def main():
 
     # Check if spaCy model is installed, if not, download it
     try:
-        spacy.load("en_core_web_sm")
+        SharedResources.nlp()
     except OSError:
         download("en_core_web_sm")
 
@@ -6,11 +6,17 @@ before sending the input to the OpenAI API.
 """
 
 import ast
+import atexit
+import json
 import logging
 import operator
 import os
 import re
+import threading
+import time
+from collections import Counter, OrderedDict
 
+from local_answers import FAQHandler, LocalAnswerRouter
 from openai import OpenAI, APIError, APIConnectionError, RateLimitError, AuthenticationError
 import spacy
 import tiktoken
@@ -24,6 +30,43 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+PHRASES_PATH = os.path.join(os.path.dirname(__file__), 'phrases_to_remove.txt')
+
+
+WORD_SEPARATORS = ("\n", ". ", " ")
+SENTENCE_SEPARATORS = ("\n", ". ", "? ", "! ")
+
+
+def iter_chunks(text, size, separators=WORD_SEPARATORS, hard_split=True):
+    """Split text into chunks of about `size` characters at the given separators.
+
+    With hard_split, a window without a separator is cut at `size`; otherwise
+    the chunk grows to the next separator, so no chunk ever splits one.
+    """
+    next_separator = re.compile('|'.join(re.escape(separator) for separator in separators))
+    start = 0
+    length = len(text)
+    while length - start > size:
+        end = start + size
+        cut = -1
+        for separator in separators:
+            position = text.rfind(separator, start + size // 2, end)
+            if position != -1:
+                cut = position + len(separator)
+                break
+        if cut == -1:
+            if hard_split:
+                cut = end  # No boundary in the window: hard split
+            else:
+                match = next_separator.search(text, end)
+                if match is None:
+                    break
+                cut = match.end()
+        yield text[start:cut]
+        start = cut
+    if start < length:
+        yield text[start:]
+
 
 class OpenAIClient:
     '''Client to interact with the OpenAI API.'''
@@ -61,6 +104,22 @@ class OpenAIClient:
 class MathOptimizer:
     '''Optimize mathematical expressions to avoid using AI.'''
 
+    # Longest prompt that is still considered a candidate math expression
+    MAX_EXPRESSION_CHARS = 200
+
+    NUMBER_HINT = re.compile(
+        r'\d|\b(?:zero|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|'
+        r'thirteen|fourteen|fifteen|sixteen|seventeen|eighteen|nineteen|twenty|thirty|'
+        r'forty|fifty|sixty|seventy|eighty|ninety|hundred|thousand|million|billion)\b',
+        re.IGNORECASE
+    )
+
+    MATH_PATTERN = re.compile(
+        r'(\d+|\w+)\s*(\+|\-|\*|\/|\bplus\b|\bminus\b|\btimes\b|\bdivided\b|\bto\s+the\s+power\s+of\b|\^)' # pylint: disable=line-too-long
+        r'\s*(\d+|\w+)',
+        re.IGNORECASE
+    )
+
     def __init__(self):
         # Initialize word-to-operator mappings
         self.word_to_operator = {
@@ -97,11 +156,11 @@ class MathOptimizer:
 
     def recognize_math(self, user_input):
         """Recognize a math expression by looking for numbers and operators."""
-        math_pattern = (
-            r'(\d+|\w+)\s*(\+|\-|\*|\/|\bplus\b|\bminus\b|\btimes\b|\bdivided\b|\bto\s+the\s+power\s+of\b|\^)' # pylint: disable=line-too-long
-            r'\s*(\d+|\w+)'
-        )
-        return bool(re.search(math_pattern, user_input, re.IGNORECASE))
+        # Cheap linear pre-filter: long prompts and prompts without digits or
+        # number words never reach the backtracking pattern below
+        if len(user_input) > self.MAX_EXPRESSION_CHARS or not self.NUMBER_HINT.search(user_input):
+            return False
+        return bool(self.MATH_PATTERN.search(user_input))
 
     def convert_ops(self, user_input):
         """Convert word-based operators (e.g., 'plus') to mathematical symbols (e.g., '+')."""
@@ -166,13 +225,113 @@ class MathOptimizer:
             return f"Error: {str(e)}"
 
 
+class PhraseTables:
+    '''Immutable, precompiled phrase-removal and contraction patterns.
+
+    Patterns are applied one after another in file (and dictionary) order,
+    exactly like the original per-phrase loop: earlier phrases take
+    precedence, so "to me" is removed before "explain to me" is tried.
+    '''
+
+    def __init__(self, phrases_to_remove, contractions, mtime=None):
+        self.phrases_to_remove = tuple(phrases_to_remove)
+        self.contractions = dict(contractions)
+        self.mtime = mtime
+        compiled = {}
+        self.phrase_patterns = tuple(
+            self.compile_phrase(phrase, compiled) for phrase in self.phrases_to_remove if phrase
+        )
+        self.contraction_patterns = tuple(
+            (self.compile_phrase(phrase, compiled), contraction)
+            for phrase, contraction in self.contractions.items() if phrase
+        )
+
+    @staticmethod
+    def compile_phrase(phrase, compiled):
+        """Compile a case-insensitive, word-bounded pattern, reusing duplicates."""
+        key = phrase.lower()
+        if key not in compiled:
+            compiled[key] = re.compile(r'\b' + re.escape(phrase) + r'\b', re.IGNORECASE)
+        return compiled[key]
+
+    @staticmethod
+    def compile_alternation(phrases):
+        """Compile phrases into one case-insensitive, word-bounded alternation."""
+        unique = {phrase.lower(): phrase for phrase in phrases if phrase}
+        if not unique:
+            return None
+        # Longest first so the single pass prefers "can not" over "can"
+        ordered = sorted(unique.values(), key=len, reverse=True)
+        return re.compile(
+            r'\b(?:' + '|'.join(re.escape(phrase) for phrase in ordered) + r')\b',
+            re.IGNORECASE
+        )
+
+    @classmethod
+    def load(cls):
+        """Read the phrase file and build a fresh set of tables."""
+        try:
+            mtime = os.path.getmtime(PHRASES_PATH)
+        except OSError:
+            mtime = None
+        return cls(TextOptimizer.load_phrases_to_remove(),
+                   TextOptimizer.load_contractions(), mtime)
+
+    def remove_phrases(self, text):
+        """Remove every listed phrase, in file order."""
+        for pattern in self.phrase_patterns:
+            text = pattern.sub('', text)
+        return text
+
+    def convert_to_contractions(self, text):
+        """Convert phrases to contractions, in table order."""
+        for pattern, contraction in self.contraction_patterns:
+            text = pattern.sub(contraction, text)
+        return text
+
+
 class TextOptimizer:
     '''Optimize text for better readability and conciseness.'''
 
-    def __init__(self):
-        self.nlp = spacy.load("en_core_web_sm")
-        self.contractions = self.load_contractions()
-        self.phrases_to_remove = self.load_phrases_to_remove()
+    # Pipeline components the linguistic compression stage does not read
+    UNUSED_COMPONENTS = ["lemmatizer"]
+
+    # Determiners that carry quantity, negation or reference and are therefore kept
+    KEEP_DETERMINERS = {
+        "no", "all", "any", "both", "each", "every", "either", "neither",
+        "some", "few", "many", "much", "several", "this", "that", "these", "those"
+    }
+
+    # Degree adverbs that rarely change the meaning of a prompt. Restrictive or
+    # contrastive adverbs ("just the names", "A rather than B") are not listed.
+    REDUNDANT_MODIFIERS = {
+        "very", "really", "quite", "basically", "actually", "literally",
+        "totally", "pretty", "fairly", "somewhat", "definitely",
+        "certainly", "truly", "honestly", "essentially"
+    }
+
+    # "a few" / "a little" mean "some"; without the article they mean "hardly any"
+    ARTICLE_QUANTIFIERS = {"few", "little"}
+
+    # Sentence-initial words that only mark discourse
+    DISCOURSE_MARKERS = {
+        "well", "so", "anyway", "anyways", "oh", "um", "uh", "okay", "ok", "hey",
+        "also", "now", "alright"
+    }
+
+    # Redundant phrases stripped from API responses, matched in a single pass
+    RESPONSE_PHRASES = [
+        "has improved", "better ability to", "compared to", "in terms of", "offers improved",
+        "provides", "includes", "while", "and also", "specializes in"
+    ]
+    RESPONSE_PHRASE_PATTERN = PhraseTables.compile_alternation(RESPONSE_PHRASES)
+
+    def __init__(self, linguistic_compression=False, batch_size=64, n_process=1,
+                 chunk_chars=10000):
+        self.linguistic_compression = linguistic_compression
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.chunk_chars = chunk_chars
 
     @staticmethod
     def load_contractions():
@@ -192,26 +351,107 @@ class TextOptimizer:
     def load_phrases_to_remove():
         """Load phrases to remove from text."""
         try:
-            with open(os.path.join(os.path.dirname(__file__),
-                                   'phrases_to_remove.txt'), 'r', encoding='utf-8') as file:
+            with open(PHRASES_PATH, 'r', encoding='utf-8') as file:
                 return [line.strip() for line in file.readlines()]
         except FileNotFoundError:
             return []
 
+    @property
+    def nlp(self):
+        """The shared spaCy pipeline, loaded on first use by the compression stage."""
+        return SharedResources.nlp()
+
+    @property
+    def contractions(self):
+        """Contractions from the currently loaded phrase tables."""
+        return SharedResources.phrase_tables().contractions
+
+    @property
+    def phrases_to_remove(self):
+        """Phrases from the currently loaded phrase tables."""
+        return SharedResources.phrase_tables().phrases_to_remove
+
     def optimize_text(self, text):
         """Optimize text by removing unnecessary phrases and converting to contractions."""
-        for phrase in self.phrases_to_remove:
-            text = re.sub(r'\b' + re.escape(phrase) + r'\b',
-                          '', text, flags=re.IGNORECASE)
-        text = self.convert_to_contractions(text)
+        # Read the tables once so a concurrent reload cannot mix old and new patterns
+        tables = SharedResources.phrase_tables()
+        if len(text) > self.chunk_chars:
+            # Stream large inputs chunk by chunk to keep latency bounded and linear.
+            # Phrases never contain sentence punctuation, so cutting only at sentence
+            # boundaries gives the same result as optimizing the whole text at once.
+            chunks = iter_chunks(text, self.chunk_chars, SENTENCE_SEPARATORS, hard_split=False)
+            return ' '.join(
+                optimized for optimized in (self.optimize_chunk(chunk, tables) for chunk in chunks)
+                if optimized
+            )
+        return self.optimize_chunk(text, tables)
+
+    @staticmethod
+    def optimize_chunk(text, tables):
+        """Apply the phrase and contraction tables to a single chunk of text."""
+        text = tables.remove_phrases(text)
+        text = tables.convert_to_contractions(text)
         return ' '.join(text.split()).strip()
 
+    def optimize_batch(self, texts):
+        """Optimize a batch of texts, compressing them in one spaCy pass if enabled."""
+        optimized = [self.optimize_text(text) for text in texts]
+        if self.linguistic_compression:
+            optimized = self.compress_batch(optimized)
+        return optimized
+
+    def compress_batch(self, texts):
+        """Drop low-information tokens from each text using POS and dependency tags."""
+        # Large texts are split so every doc stays well below spaCy's max_length
+        chunks, owners = [], []
+        for index, text in enumerate(texts):
+            for chunk in iter_chunks(text, self.chunk_chars):
+                chunks.append(chunk)
+                owners.append(index)
+        compressed = [[] for _ in texts]
+        # spaCy does not guarantee concurrent calls on one pipeline are safe, and the
+        # pipeline is shared by every session and the prewarmer, so serialize them
+        with SharedResources.nlp_lock:
+            docs = list(self.nlp.pipe(chunks, batch_size=self.batch_size,
+                                      n_process=self.n_process))
+        for index, doc in zip(owners, docs):
+            compressed[index].append(self.compress_doc(doc))
+        return [' '.join(parts) for parts in compressed]
+
+    def compress_doc(self, doc):
+        """Rebuild a parsed document without its low-information tokens."""
+        parts = []
+        previous_dropped = False
+        for token in doc:
+            if self.is_low_information(token) or (previous_dropped and token.text == ","):
+                previous_dropped = True
+                continue
+            previous_dropped = False
+            parts.append(token.text_with_ws)
+        compressed = ' '.join(''.join(parts).split()).strip()
+        # Never send an empty prompt; keep the input if everything was dropped
+        return compressed or doc.text
+
+    def is_low_information(self, token):
+        """Check whether a token can be dropped without changing the prompt's intent."""
+        if token.ent_type_ or token.like_num or token.dep_ == "neg":
+            return False
+        lower = token.lower_
+        if token.pos_ == "DET":
+            if token.tag_ != "DT" or lower in self.KEEP_DETERMINERS:
+                return False
+            following = token.nbor() if token.i + 1 < len(token.doc) else None
+            return not (token.head.lower_ in self.ARTICLE_QUANTIFIERS or (
+                following is not None and following.lower_ in self.ARTICLE_QUANTIFIERS))
+        if token.pos_ == "INTJ" or token.dep_ in ("intj", "discourse"):
+            return True
+        if token.is_sent_start and lower in self.DISCOURSE_MARKERS:
+            return token.pos_ in ("ADV", "INTJ", "CCONJ")
+        return token.dep_ == "advmod" and lower in self.REDUNDANT_MODIFIERS
+
     def convert_to_contractions(self, text):
         """Convert phrases to contractions."""
-        for phrase, contraction in self.contractions.items():
-            text = re.sub(r'\b' + re.escape(phrase) + r'\b',
-                          contraction, text, flags=re.IGNORECASE)
-        return text
+        return SharedResources.phrase_tables().convert_to_contractions(text)
 
     @staticmethod
     def trim_response(response_text):
@@ -222,12 +462,7 @@ class TextOptimizer:
     @staticmethod
     def deep_optimize_response(response_text):
         """Deeply optimize response by removing redundant phrases."""
-        phrases_to_remove = [
-            "has improved", "better ability to", "compared to", "in terms of", "offers improved",
-            "provides", "includes", "while", "and also", "specializes in"
-        ]
-        for phrase in phrases_to_remove:
-            response_text = response_text.replace(phrase, "")
+        response_text = TextOptimizer.RESPONSE_PHRASE_PATTERN.sub('', response_text)
         return ' '.join(response_text.split())
 
     @staticmethod
@@ -238,14 +473,543 @@ class TextOptimizer:
         return ", ".join(cleaned_items[:3])
 
 
+class ResponseCompactor:
+    '''Configurable post-processing pipeline that shortens API responses.'''
+
+    # Stage name -> TextOptimizer function, in the order stages are applied
+    STAGES = {
+        "remove_phrases": TextOptimizer.deep_optimize_response,
+        "truncate_list": TextOptimizer.truncate_list,
+        "trim": TextOptimizer.trim_response,
+    }
+    # Opt-in: the stages change wording ("while", "provides", ...) of every answer
+    DEFAULT_STAGES = ()
+
+    def __init__(self, stages=DEFAULT_STAGES):
+        unknown = set(stages) - set(self.STAGES)
+        if unknown:
+            raise ValueError(f"Unknown response compaction stages: {sorted(unknown)}")
+        self.stages = tuple(stage for stage in self.STAGES if stage in stages)
+        self.tokens_removed = 0
+        self.responses_compacted = 0
+        self._lock = threading.Lock()
+
+    def compact(self, response_text):
+        """Apply the enabled stages to a response and count the tokens they removed."""
+        if not self.stages or response_text.startswith("Error:"):
+            return response_text
+        compacted = response_text
+        for stage in self.stages:
+            compacted = self.STAGES[stage](compacted)
+        if not compacted:
+            return response_text
+
+        removed = 0
+        if compacted != response_text:
+            removed = max(SharedResources.count_tokens(response_text)
+                          - SharedResources.count_tokens(compacted), 0)
+        with self._lock:
+            self.tokens_removed += removed
+            self.responses_compacted += 1
+        return compacted
+
+    def stats(self):
+        """Return the number of responses compacted and tokens removed so far."""
+        with self._lock:
+            return {
+                "stages": list(self.stages),
+                "responses_compacted": self.responses_compacted,
+                "tokens_removed": self.tokens_removed,
+            }
+
+
+class InputGuard:
+    '''Admission check that rejects prompts too large to process safely.'''
+
+    DEFAULT_MAX_CHARS = 100000
+
+    def __init__(self, max_chars=DEFAULT_MAX_CHARS):
+        self.max_chars = max_chars
+
+    def check(self, user_input):
+        """Return an error message for inputs that are not admitted, otherwise None."""
+        if self.max_chars is not None and len(user_input) > self.max_chars:
+            logging.warning("Rejected input of %d characters (limit %d)",
+                            len(user_input), self.max_chars)
+            return (f"Error: Input is too long ({len(user_input)} characters). "
+                    f"Please shorten it to {self.max_chars} characters or fewer.")
+        return None
+
+
+class ResponseCache:
+    '''Thread-safe, size-bounded LRU cache of responses shared by all sessions.
+
+    Entries expire after `ttl` seconds; a ttl of None keeps them until evicted.
+    '''
+
+    def __init__(self, max_entries=10000, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, expiry time or None)
+        self._lock = threading.Lock()
+
+    def _live_entry(self, key):
+        """Return the (value, expiry) entry for a key, dropping it if expired. Hold the lock."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._entries[key]
+            return None
+        return entry
+
+    def get(self, key, default=None):
+        """Return the cached value for a key, marking it as recently used."""
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                return default
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        """Store a value, evicting the least recently used entry when full."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def needs_refresh(self, key, margin=0):
+        """Check whether a key is missing or expires within `margin` seconds."""
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                return True
+            return entry[1] is not None and entry[1] - time.monotonic() <= margin
+
+    def clear(self):
+        """Remove every cached entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._live_entry(key) is not None
+
+    def __getitem__(self, key):
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                raise KeyError(key)
+            return entry[0]
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class QueryLog:
+    '''Thread-safe log of prompt frequencies and warm/cold cache outcomes.
+
+    When `path` is set the prompt counts are persisted as JSON so the most
+    frequent prompts can be replayed after a restart. The file holds raw
+    prompt text in plaintext, so only prompts seen at least `min_count`
+    times are written, and prompts longer than `max_prompt_chars` are never
+    stored. It is saved every `save_every` records.
+    '''
+
+    def __init__(self, path=None, max_entries=10000, min_count=2, save_every=50,
+                 max_prompt_chars=500):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_prompt_chars = max_prompt_chars
+        self.min_count = min_count
+        self.save_every = save_every
+        self.counts = Counter()
+        self.warm = 0
+        self.cold = 0
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load persisted prompt counts, ignoring a missing or unreadable file."""
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                counts = json.load(file)
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logging.error("Failed to load query log: %s", str(e))
+            return
+        with self._lock:
+            self.counts.update({str(prompt): int(count) for prompt, count in counts.items()})
+
+    def save(self):
+        """Persist prompt counts atomically."""
+        if not self.path:
+            return
+        with self._lock:
+            counts = {prompt: count for prompt, count in self.counts.items()
+                      if count >= self.min_count}
+            self._unsaved = 0
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(counts, file)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.error("Failed to save query log: %s", str(e))
+
+    def record(self, prompt, warm):
+        """Record a cache-eligible prompt and whether it was served warm."""
+        # Long one-off documents are never worth prewarming; count the outcome only
+        keep_prompt = len(prompt) <= self.max_prompt_chars
+        with self._lock:
+            if warm:
+                self.warm += 1
+            else:
+                self.cold += 1
+            if not keep_prompt:
+                return
+            self.counts[prompt] += 1
+            if len(self.counts) > self.max_entries:
+                # Keep the most frequent half so memory stays bounded
+                self.counts = Counter(dict(self.counts.most_common(self.max_entries // 2)))
+            self._unsaved += 1
+            save_due = bool(self.path) and self._unsaved >= self.save_every
+        if save_due:
+            self.save()
+
+    def top(self, n):
+        """Return the n most frequent prompts."""
+        with self._lock:
+            return [prompt for prompt, _ in self.counts.most_common(n)]
+
+    def coverage(self):
+        """Report the share of cache-eligible traffic served warm since startup."""
+        with self._lock:
+            requests = self.warm + self.cold
+            return {
+                "requests": requests,
+                "warm": self.warm,
+                "cold": self.cold,
+                "coverage": (self.warm / requests * 100) if requests else 0,
+            }
+
+
+class Prewarmer:
+    '''Background worker that fills and refreshes the cache for frequent prompts.
+
+    Every `interval` seconds it replays the `top_n` most frequent prompts from
+    the query log that are missing from the cache or expire within
+    `refresh_margin` seconds, issuing at most `max_requests_per_minute` API
+    calls so foreground traffic keeps most of the rate budget. The margin is
+    raised to at least `interval` plus a full cycle of requests, so a popular
+    entry is always refreshed before it expires.
+
+    The worker runs its own session built from `api_key` and
+    `session_options` (SUSTAIN keyword arguments), so it never borrows a
+    user's session. Cache entries are keyed by session settings, so only
+    sessions created with the same options are served the warmed entries.
+    '''
+
+    def __init__(self, api_key, session_options=None, top_n=50, interval=600,
+                 max_requests_per_minute=10, refresh_margin=300):
+        if not max_requests_per_minute > 0:
+            raise ValueError(
+                f"max_requests_per_minute must be positive, got {max_requests_per_minute!r}")
+        self.session = SUSTAIN(api_key, **(session_options or {}))
+        self.top_n = top_n
+        self.interval = interval
+        self.request_spacing = 60 / max_requests_per_minute
+        # An entry that is not due now must outlive the wait for the next cycle
+        # and that cycle's rate-limited requests, or it expires in between
+        self.refresh_margin = max(refresh_margin, interval + top_n * self.request_spacing)
+        self.warmed = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def due_prompts(self):
+        """Return the frequent prompts whose cache entries are missing or about to expire."""
+        session = self.session
+        return [prompt for prompt in session.query_log.top(self.top_n)
+                if session.cache.needs_refresh(session.cache_key(prompt), self.refresh_margin)]
+
+    def run_once(self):
+        """Warm every due prompt once, respecting the rate limit. Return the number warmed."""
+        warmed = 0
+        for index, prompt in enumerate(self.due_prompts()):
+            if index and self._stop.wait(self.request_spacing):
+                break
+            response_text, _ = self.session.fetch_response(prompt)
+            if not response_text.startswith("Error:"):
+                warmed += 1
+        self.warmed += warmed
+        self.session.query_log.save()
+        logging.info("Prewarmed %d prompts; coverage %s", warmed,
+                     self.session.query_log.coverage())
+        return warmed
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:  # pylint: disable=broad-except
+                # Keep the worker alive; the next cycle retries
+                logging.error("Prewarm cycle failed: %s", str(e))
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start warming in a daemon thread; the first cycle runs immediately."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sustain-prewarm", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the worker and persist the query log."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.session.query_log.save()
+
+    def stats(self):
+        """Report prompts warmed so far and the share of traffic served warm."""
+        return {"warmed": self.warmed, **self.session.query_log.coverage()}
+
+
+class SharedResources:
+    '''Process-wide, thread-safe holder for the heavy resources every session shares.'''
+
+    # Held while the shared spaCy pipeline runs
+    nlp_lock = threading.Lock()
+
+    # Seconds between checks of the phrase file for hot reload
+    PHRASE_RELOAD_INTERVAL = 5
+
+    _lock = threading.RLock()
+    _phrases_checked_at = 0.0
+    _nlp = None
+    _tokenizer = None
+    _phrase_tables = None
+    _math_optimizer = None
+    _local_router = None
+    _response_compactors = {}
+    _cache = None
+    _query_log = None
+    _prewarmer = None
+    _clients = {}
+    _text_optimizers = {}
+
+    @classmethod
+    def nlp(cls):
+        """Return the spaCy pipeline, loading it on first use."""
+        if cls._nlp is None:
+            with cls._lock:
+                if cls._nlp is None:
+                    cls._nlp = spacy.load(
+                        "en_core_web_sm", disable=TextOptimizer.UNUSED_COMPONENTS)
+        return cls._nlp
+
+    @classmethod
+    def tokenizer(cls):
+        """Return the tiktoken encoding used for token counts."""
+        if cls._tokenizer is None:
+            with cls._lock:
+                if cls._tokenizer is None:
+                    cls._tokenizer = tiktoken.get_encoding("cl100k_base")
+        return cls._tokenizer
+
+    @classmethod
+    def count_tokens(cls, text, chunk_chars=10000):
+        """Count tokens, encoding large texts in chunks to keep the cost linear."""
+        tokenizer = cls.tokenizer()
+        # encode_ordinary treats special-token text such as "<|endoftext|>" as plain text
+        if len(text) <= chunk_chars:
+            return len(tokenizer.encode_ordinary(text))
+        return sum(len(tokenizer.encode_ordinary(chunk)) for chunk in iter_chunks(text, chunk_chars))
+
+    @classmethod
+    def phrase_tables(cls):
+        """Return the current compiled phrase and contraction tables.
+
+        At most once every PHRASE_RELOAD_INTERVAL seconds this also checks the
+        phrase file and hot-reloads the tables if it changed.
+        """
+        tables = cls._phrase_tables
+        if tables is None:
+            with cls._lock:
+                if cls._phrase_tables is None:
+                    cls._phrase_tables = PhraseTables.load()
+                    cls._phrases_checked_at = time.monotonic()
+                tables = cls._phrase_tables
+        elif time.monotonic() - cls._phrases_checked_at >= cls.PHRASE_RELOAD_INTERVAL:
+            tables = cls.reload_phrases_if_changed()
+        return tables
+
+    @classmethod
+    def reload_phrases(cls):
+        """Rebuild the phrase tables from disk and swap them in atomically."""
+        tables = PhraseTables.load()
+        # A single reference assignment: readers see either the old or the new tables
+        cls._phrase_tables = tables
+        logging.info("Reloaded %d phrases to remove", len(tables.phrases_to_remove))
+        return tables
+
+    @classmethod
+    def reload_phrases_if_changed(cls):
+        """Reload the phrase tables if the phrase file changed since they were built."""
+        cls._phrases_checked_at = time.monotonic()
+        try:
+            mtime = os.path.getmtime(PHRASES_PATH)
+        except OSError:
+            mtime = None
+        tables = cls._phrase_tables
+        if tables is None or mtime != tables.mtime:
+            with cls._lock:
+                # Another thread may have reloaded while we waited for the lock
+                tables = cls._phrase_tables
+                if tables is None or mtime != tables.mtime:
+                    tables = cls.reload_phrases()
+        return tables
+
+    @classmethod
+    def math_optimizer(cls):
+        """Return the shared, stateless math optimizer."""
+        if cls._math_optimizer is None:
+            with cls._lock:
+                if cls._math_optimizer is None:
+                    cls._math_optimizer = MathOptimizer()
+        return cls._math_optimizer
+
+    @classmethod
+    def local_router(cls):
+        """Return the default local-answer router."""
+        if cls._local_router is None:
+            with cls._lock:
+                if cls._local_router is None:
+                    cls._local_router = LocalAnswerRouter()
+        return cls._local_router
+
+    @classmethod
+    def response_compactor(cls, stages=ResponseCompactor.DEFAULT_STAGES):
+        """Return the shared response compactor for a set of enabled stages."""
+        key = tuple(sorted(stages))
+        compactor = cls._response_compactors.get(key)
+        if compactor is None:
+            with cls._lock:
+                compactor = cls._response_compactors.get(key)
+                if compactor is None:
+                    compactor = cls._response_compactors[key] = ResponseCompactor(stages)
+        return compactor
+
+    @staticmethod
+    def cache_ttl_from_env():
+        """Read SUSTAIN_CACHE_TTL in seconds, falling back to no TTL if it is invalid."""
+        value = os.getenv("SUSTAIN_CACHE_TTL")
+        if not value:
+            return None
+        try:
+            ttl = float(value)
+        except ValueError:
+            ttl = 0
+        if not ttl > 0:
+            logging.error("Ignoring invalid SUSTAIN_CACHE_TTL %r; cache entries will not expire",
+                          value)
+            return None
+        return ttl
+
+    @classmethod
+    def cache(cls):
+        """Return the response cache shared by every session (TTL from SUSTAIN_CACHE_TTL)."""
+        if cls._cache is None:
+            with cls._lock:
+                if cls._cache is None:
+                    cls._cache = ResponseCache(ttl=cls.cache_ttl_from_env())
+        return cls._cache
+
+    @classmethod
+    def query_log(cls):
+        """Return the shared query log, persisted to SUSTAIN_QUERY_LOG (and at exit) if set."""
+        if cls._query_log is None:
+            with cls._lock:
+                if cls._query_log is None:
+                    cls._query_log = QueryLog(os.getenv("SUSTAIN_QUERY_LOG"))
+                    if cls._query_log.path:
+                        # Persist counts recorded since the last periodic save
+                        atexit.register(cls._query_log.save)
+        return cls._query_log
+
+    @classmethod
+    def prewarmer(cls, api_key, session_options=None, **options):
+        """Return the process-wide prewarmer, starting it on first use.
+
+        The first call's api_key, session_options and options configure it;
+        later calls return the running prewarmer unchanged.
+        """
+        if cls._prewarmer is None:
+            with cls._lock:
+                if cls._prewarmer is None:
+                    cls._prewarmer = Prewarmer(api_key, session_options, **options).start()
+        return cls._prewarmer
+
+    @classmethod
+    def api_client(cls, api_key):
+        """Return the OpenAI client (and its HTTP connection pool) for an API key."""
+        client = cls._clients.get(api_key)
+        if client is None:
+            with cls._lock:
+                client = cls._clients.get(api_key)
+                if client is None:
+                    client = cls._clients[api_key] = OpenAIClient(api_key)
+        return client
+
+    @classmethod
+    def text_optimizer(cls, linguistic_compression=False):
+        """Return the shared text optimizer for a compression setting."""
+        optimizer = cls._text_optimizers.get(linguistic_compression)
+        if optimizer is None:
+            with cls._lock:
+                optimizer = cls._text_optimizers.get(linguistic_compression)
+                if optimizer is None:
+                    optimizer = TextOptimizer(linguistic_compression=linguistic_compression)
+                    cls._text_optimizers[linguistic_compression] = optimizer
+        return optimizer
+
+
 class SUSTAIN:
-    '''SUSTAIN: A framework for sustainable AI interactions.'''
+    '''SUSTAIN: A framework for sustainable AI interactions.
 
-    def __init__(self, api_key):
-        self.api_client = OpenAIClient(api_key)
-        self.text_optimizer = TextOptimizer()
-        self.cache = {}
-        self.math_optimizer = MathOptimizer()
+    Each instance is a lightweight per-user session; the model, tokenizer,
+    phrase tables, API client and response cache are shared process-wide.
+    '''
+
+    def __init__(self, api_key, linguistic_compression=False, local_answers=True,
+                 local_router=None, response_stages=ResponseCompactor.DEFAULT_STAGES,
+                 max_input_chars=InputGuard.DEFAULT_MAX_CHARS):
+        self.api_client = SharedResources.api_client(api_key)
+        self.text_optimizer = SharedResources.text_optimizer(linguistic_compression)
+        self.cache = SharedResources.cache()
+        self.math_optimizer = SharedResources.math_optimizer()
+        # local_answers=False turns the stage off; local_router overrides the shared router
+        self.local_router = None
+        if local_answers:
+            self.local_router = local_router or SharedResources.local_router()
+        self.response_compactor = SharedResources.response_compactor(response_stages)
+        self.input_guard = InputGuard(max_input_chars)
+        self.query_log = SharedResources.query_log()
+
+    def cache_key(self, user_input):
+        """Key the shared cache by prompt and by the session settings that shape the entry."""
+        return (user_input, self.text_optimizer.linguistic_compression,
+                self.response_compactor.stages)
 
     def answer_math(self, user_input):
         """Answer math queries directly without calling the API."""
@@ -258,31 +1022,64 @@ class SUSTAIN:
             return result
         return None
 
+    def answer_locally(self, user_input):
+        """Answer FAQs, unit conversions, percentages and date arithmetic without the API."""
+        if self.local_router is None:
+            return None
+        return self.local_router.answer(user_input)
+
+    def route_locally(self, user_input):
+        """Return (handler name, answer) from the local router, or (None, None)."""
+        if self.local_router is None:
+            return None, None
+        return self.local_router.route(user_input)
+
     def get_response(self, user_input):
-        """Get a response from the OpenAI API or handle math queries."""
+        """Get a response from the OpenAI API or handle math and local queries."""
+        rejection = self.input_guard.check(user_input)
+        if rejection is not None:
+            return rejection, 0
+
         math_answer = self.answer_math(user_input)
         if math_answer is not None:
             return math_answer, 100  # Assume 100% token savings for math optimizations
 
-        if user_input in self.cache:
-            return self.cache[user_input]
+        handler, local_answer = self.route_locally(user_input)
+        if local_answer is not None:
+            # FAQ answers were always canned replies, so like before they report no
+            # savings; computed answers (units, dates, ...) replace an API call
+            return local_answer, 0 if handler == FAQHandler.name else 100
+
+        cached = self.cache.get(self.cache_key(user_input))
+        self.query_log.record(user_input, warm=cached is not None)
+        if cached is not None:
+            return cached
+        return self.fetch_response(user_input)
 
-        optimized_input = self.text_optimizer.optimize_text(user_input)
+    def fetch_response(self, user_input):
+        """Optimize the input, query the API and cache the compacted response."""
+        optimized_input = self.text_optimizer.optimize_batch([user_input])[0]
+        if not optimized_input.strip():
+            # Everything was filler (e.g. "explain to me"); never send an empty prompt
+            optimized_input = user_input
         original_tokens = self.count_tokens(user_input)
         optimized_tokens = self.count_tokens(optimized_input)
         percentage_saved = self.calculate_percentage_saved(
             original_tokens, optimized_tokens)
 
         response_text = self.api_client.get_openai_response(optimized_input)
+        # Cache the compact form so later hits and follow-up context stay small
+        response_text = self.response_compactor.compact(response_text)
 
-        self.cache[user_input] = (response_text, percentage_saved)
+        # Errors are returned but not cached, so the next request retries the API
+        if not response_text.startswith("Error:"):
+            self.cache.set(self.cache_key(user_input), (response_text, percentage_saved))
         return response_text, percentage_saved
 
     @staticmethod
     def count_tokens(text):
         """Count the number of tokens in the text."""
-        tokenizer = tiktoken.get_encoding("cl100k_base")
-        return len(tokenizer.encode(text))
+        return SharedResources.count_tokens(text)
 
     @staticmethod
     def calculate_percentage_saved(original_tokens, optimized_tokens):
@@ -291,3 +1088,38 @@ class SUSTAIN:
             return 0
         tokens_saved = original_tokens - optimized_tokens
         return max((tokens_saved / original_tokens) * 100, 0)
+
+    def compare_compression(self, prompts):
+        """Compare token savings and per-prompt cost of regex-only and linguistic compression."""
+        prompts = list(prompts)
+        if not prompts:
+            return {}
+        optimizer = self.text_optimizer
+
+        start = time.perf_counter()
+        regex_outputs = [optimizer.optimize_text(prompt) for prompt in prompts]
+        regex_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compressed_outputs = optimizer.compress_batch(regex_outputs)
+        compression_seconds = time.perf_counter() - start
+
+        original_tokens = sum(self.count_tokens(prompt) for prompt in prompts)
+        regex_tokens = sum(self.count_tokens(text) for text in regex_outputs)
+        compressed_tokens = sum(self.count_tokens(text) for text in compressed_outputs)
+
+        report = {
+            "prompts": len(prompts),
+            "original_tokens": original_tokens,
+            "regex_tokens": regex_tokens,
+            "compressed_tokens": compressed_tokens,
+            "regex_percentage_saved": self.calculate_percentage_saved(
+                original_tokens, regex_tokens),
+            "compressed_percentage_saved": self.calculate_percentage_saved(
+                original_tokens, compressed_tokens),
+            "regex_ms_per_prompt": regex_seconds * 1000 / len(prompts),
+            "compressed_ms_per_prompt":
+                (regex_seconds + compression_seconds) * 1000 / len(prompts),
+        }
+        logging.info("Compression report: %s", report)
+        return report
@@ -0,0 +1,9 @@
+'''
+Description: Shared pytest configuration. The application modules import each
+other as top-level modules, so the application directory is put on sys.path.
+'''
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'application')))
@@ -0,0 +1,74 @@
+'''
+Description: Tests for the local-answer router and its handlers.
+'''
+
+import datetime
+
+import pytest
+
+from local_answers import (DateArithmeticHandler, LocalAnswerRouter, PercentageHandler,
+                           SUSTAIN_DESCRIPTION, UnitConversionHandler)
+
+
+@pytest.fixture(name="router")
+def fixture_router():
+    '''Router with the default handlers and a fixed "today" of Monday 19 October 2026.'''
+    return LocalAnswerRouter(handlers=[
+        UnitConversionHandler(),
+        PercentageHandler(),
+        DateArithmeticHandler(today=lambda: datetime.date(2026, 10, 19)),
+    ])
+
+
+@pytest.mark.parametrize("prompt, expected", [
+    ("What is SUSTAIN?", SUSTAIN_DESCRIPTION),
+    ("convert 5 km to miles", "5 km = 3.1069 miles"),
+    ("What is 100 F in C?", "100 f = 37.7778 c"),
+    ("what is 15% of 200", "15% of 200 is 30"),
+    ("30 is what percent of 200?", "30 is 15% of 200"),
+    ("what percent of 200 is 30", "30 is 15% of 200"),
+    ("what date is 10 days from now?", "Thursday, 29 October 2026"),
+    ("3 weeks ago", "Monday, 28 September 2026"),
+    ("what day will it be in 2 weeks", "Monday, 2 November 2026"),
+    ("how many days until 2026-12-25?", "67 days until 2026-12-25"),
+    ("days between 2026-01-01 and 2026-03-01", "There are 59 days between 2026-01-01 and 2026-03-01"),
+    ("what's tomorrow", "Tuesday, 20 October 2026"),
+    ("what is today's date?", "Monday, 19 October 2026"),
+])
+def test_answers_local_queries(router, prompt, expected):
+    '''Whole-prompt queries are answered locally.'''
+    assert router.answer(prompt) == expected
+
+
+@pytest.mark.parametrize("prompt", [
+    "How can I learn Python in 30 days?",
+    "I got sick 3 days ago, what medicine should I take?",
+    "Write a story set 100 years ago about 2 weeks later",
+    "Why do 90% of 100 startups fail?",
+    "Is it safe to run 5 km to work every day?",
+    "How many days until 2026-12-25 should I start packing?",
+    "explain machine learning",
+    "5 kg to miles",
+    "what date is 99999999 days from now?",
+    "3000000 weeks ago",
+    "what date is 9999999999 days from now",
+])
+def test_prompts_containing_fragments_fall_through(router, prompt):
+    '''Prompts that merely contain a matching fragment go to the API.'''
+    assert router.answer(prompt) is None
+
+
+def test_counts_hits_per_handler(router):
+    '''Each answered prompt is counted against the handler that answered it.'''
+    router.answer("What is SUSTAIN?")
+    router.answer("convert 5 km to miles")
+    router.answer("what is 15% of 200")
+    router.answer("explain machine learning")
+    assert router.stats() == {
+        "faq": 1, "unit_conversion": 1, "percentage": 1, "date_arithmetic": 0
+    }
+
+
+def test_skips_long_prompts(router):
+    '''Prompts longer than max_chars never reach the handlers.'''
+    assert router.answer("convert 5 km to miles" + " " * router.max_chars) is None
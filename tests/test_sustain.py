@@ -0,0 +1,164 @@
+'''
+Description: Tests for the SUSTAIN session and its optimizers. The OpenAI API
+is never called: the shared client for the test key is replaced by a fake.
+'''
+
+import pytest
+
+import sustain
+from sustain import SUSTAIN, SharedResources
+
+API_KEY = "test-key"
+
+
+class FakeOpenAIClient:
+    '''Stands in for OpenAIClient and records the prompts it receives.'''
+
+    def __init__(self):
+        self.prompts = []
+
+    def get_openai_response(self, user_input):
+        '''Return a canned response instead of calling the API.'''
+        self.prompts.append(user_input)
+        return f"API answer to {user_input}"
+
+
+@pytest.fixture(name="api")
+def fixture_api(monkeypatch):
+    '''Fake API client, fresh shared cache and query log, and a whitespace token counter.'''
+    client = FakeOpenAIClient()
+    monkeypatch.setitem(SharedResources._clients, API_KEY, client)  # pylint: disable=protected-access
+    monkeypatch.setattr(SharedResources, "_cache", sustain.ResponseCache())
+    # In-memory log, so tests never write to a developer's SUSTAIN_QUERY_LOG
+    monkeypatch.setattr(SharedResources, "_query_log", sustain.QueryLog())
+    monkeypatch.setattr(SharedResources, "count_tokens",
+                        classmethod(lambda cls, text, chunk_chars=10000: len(text.split())))
+    return client
+
+
+def test_local_answers_can_be_disabled(api):
+    '''local_answers=False sends FAQ prompts to the API.'''
+    session = SUSTAIN(API_KEY, local_answers=False)
+    assert session.local_router is None
+    response, _ = session.get_response("What is SUSTAIN?")
+    assert response.startswith("API answer")
+    assert api.prompts
+
+
+def test_local_answers_enabled_by_default(api):
+    '''The FAQ is answered locally without calling the API, reporting 0% as before.'''
+    response, percentage_saved = SUSTAIN(API_KEY).get_response("What is SUSTAIN?")
+    assert response.startswith("I am SUSTAIN")
+    assert percentage_saved == 0
+    assert not api.prompts
+
+
+def test_computed_local_answers_report_full_savings(api):
+    '''Handlers that replace an API call report 100% savings.'''
+    response, percentage_saved = SUSTAIN(API_KEY).get_response("convert 5 km to miles")
+    assert response == "5 km = 3.1069 miles"
+    assert percentage_saved == 100
+    assert not api.prompts
+
+
+def test_responses_are_not_compacted_by_default(api):
+    '''Without opting in, API responses reach the user unchanged.'''
+    api.get_openai_response = lambda user_input: "Don't touch the stove while it provides heat."
+    response, _ = SUSTAIN(API_KEY).get_response("explain stoves")
+    assert response == "Don't touch the stove while it provides heat."
+
+
+def test_remove_phrases_stage_is_word_bounded(api):
+    '''The opt-in phrase stage removes whole words only.'''
+    api.get_openai_response = lambda user_input: "Python provides typing; stewhile unaffected."
+    session = SUSTAIN(API_KEY, response_stages=("remove_phrases",))
+    response, _ = session.get_response("explain python")
+    assert response == "Python typing; stewhile unaffected."
+
+
+def test_cache_is_keyed_by_session_settings(api):
+    '''Sessions with different compaction stages do not share cached responses.'''
+    api.get_openai_response = lambda user_input: "Python provides typing."
+    compacting = SUSTAIN(API_KEY, response_stages=("remove_phrases",))
+    plain = SUSTAIN(API_KEY)
+    assert compacting.get_response("explain python")[0] == "Python typing."
+    assert plain.get_response("explain python")[0] == "Python provides typing."
+    assert compacting.get_response("explain python")[0] == "Python typing."
+
+
+def test_query_log_saves_repeated_prompts(tmp_path):
+    '''The log is written every save_every records and only keeps repeated prompts.'''
+    path = tmp_path / "query_log.json"
+    query_log = sustain.QueryLog(str(path), save_every=3)
+    query_log.record("explain ML", warm=False)
+    query_log.record("explain ML", warm=True)
+    assert not path.exists()
+    query_log.record("a one-off private question", warm=False)
+    assert sustain.QueryLog(str(path)).counts == {"explain ML": 2}
+    assert query_log.coverage()["coverage"] == pytest.approx(100 / 3)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("3600", 3600.0), ("", None), ("one hour", None), ("-5", None), ("nan", None),
+])
+def test_cache_ttl_from_env(monkeypatch, value, expected):
+    '''Malformed TTLs are ignored instead of crashing session construction.'''
+    monkeypatch.setenv("SUSTAIN_CACHE_TTL", value)
+    assert SharedResources.cache_ttl_from_env() == expected
+
+
+def test_prewarmer_uses_its_own_session(api, monkeypatch):
+    '''The prewarmer warms entries for its configured settings, not a user's session.'''
+    user = SUSTAIN(API_KEY, response_stages=("remove_phrases",))
+    user.get_response("explain ML")
+    user.cache.clear()
+
+    prewarmer = sustain.Prewarmer(API_KEY, max_requests_per_minute=6000)
+    assert prewarmer.session is not user
+    assert prewarmer.due_prompts() == ["explain ML"]
+    assert prewarmer.run_once() == 1
+    assert SUSTAIN(API_KEY).get_response("explain ML")[0] == "API answer to explain ML"
+    assert len(api.prompts) == 2
+    assert prewarmer.due_prompts() == []
+
+
+def test_filler_only_prompt_is_sent_unchanged(api):
+    '''A prompt that optimizes to nothing is sent as typed, never empty.'''
+    SUSTAIN(API_KEY).get_response("please thank you")
+    assert api.prompts == ["please thank you"]
+
+
+def test_out_of_range_dates_fall_through_to_api(api):
+    '''Date offsets beyond the calendar go to the API instead of raising.'''
+    response, _ = SUSTAIN(API_KEY).get_response("3000000 weeks ago")
+    assert response == "API answer to 3000000 weeks ago"
+
+
+def test_prewarmer_refreshes_entries_expiring_before_next_cycle(api, monkeypatch):
+    '''Entries that would expire before the next cycle are refreshed now.'''
+    monkeypatch.setattr(SharedResources, "_cache", sustain.ResponseCache(ttl=1.5))
+    SUSTAIN(API_KEY).get_response("explain ML")
+
+    prewarmer = sustain.Prewarmer(API_KEY, top_n=2, interval=1, refresh_margin=0.1,
+                                  max_requests_per_minute=600)
+    assert prewarmer.refresh_margin == pytest.approx(1.2)
+    assert prewarmer.due_prompts() == []
+
+    SharedResources.cache().set(prewarmer.session.cache_key("explain ML"), ("old", 0), ttl=1.0)
+    assert prewarmer.due_prompts() == ["explain ML"]
+
+
+def test_query_log_skips_long_prompts():
+    '''Long prompts count towards coverage but are never stored.'''
+    query_log = sustain.QueryLog(max_prompt_chars=10)
+    query_log.record("x" * 11, warm=False)
+    query_log.record("explain ML", warm=True)
+    assert query_log.counts == {"explain ML": 1}
+    assert query_log.coverage()["requests"] == 2
+
+
+@pytest.mark.parametrize("rate", [0, -1])
+def test_prewarmer_rejects_non_positive_rate(api, rate):
+    '''A zero or negative rate limit is a configuration error.'''
+    with pytest.raises(ValueError, match="max_requests_per_minute"):
+        sustain.Prewarmer(API_KEY, max_requests_per_minute=rate)
@@ -0,0 +1,156 @@
+'''
+Description: Tests for TextOptimizer's phrase removal and linguistic compression.
+'''
+
+import os
+import random
+import re
+
+import pytest
+import spacy
+from spacy.tokens import Doc
+
+import sustain
+from sustain import SharedResources, TextOptimizer
+
+HAS_MODEL = spacy.util.is_package("en_core_web_sm")
+
+
+def make_doc(tokens, entities=None):
+    '''Build a parsed Doc from (text, pos, tag, dep, head index) tuples.'''
+    words, pos, tags, deps, heads = (list(column) for column in zip(*tokens))
+    ents = ["O"] * len(words)
+    for index, label in (entities or {}).items():
+        ents[index] = label
+    return Doc(spacy.blank("en").vocab, words=words, pos=pos, tags=tags, deps=deps,
+               heads=heads, sent_starts=[True] + [False] * (len(words) - 1), ents=ents)
+
+
+@pytest.mark.parametrize("tokens, entities, expected", [
+    # Discourse marker, article and degree adverb are dropped; entity and number kept
+    ([("Well", "INTJ", "UH", "intj", 3), (",", "PUNCT", ",", "punct", 3),
+      ("what", "PRON", "WP", "attr", 3), ("is", "AUX", "VBZ", "ROOT", 3),
+      ("the", "DET", "DT", "det", 8), ("very", "ADV", "RB", "advmod", 6),
+      ("best", "ADJ", "JJS", "amod", 8), ("Python", "PROPN", "NNP", "compound", 8),
+      ("version", "NOUN", "NN", "nsubj", 3), ("for", "ADP", "IN", "prep", 8),
+      ("2", "NUM", "CD", "nummod", 11), ("servers", "NOUN", "NNS", "pobj", 9),
+      ("?", "PUNCT", ".", "punct", 3)],
+     {7: "B-PRODUCT"}, "what is best Python version for 2 servers ?"),
+    # Demonstratives are kept
+    ([("Is", "AUX", "VBZ", "ROOT", 0), ("this", "DET", "DT", "nsubj", 0),
+      ("safe", "ADJ", "JJ", "acomp", 0), ("?", "PUNCT", ".", "punct", 0)],
+     None, "Is this safe ?"),
+    ([("explain", "VERB", "VB", "ROOT", 0), ("this", "DET", "DT", "det", 2),
+      ("error", "NOUN", "NN", "dobj", 0)],
+     None, "explain this error"),
+    # Negation and quantifiers are kept, the article is dropped
+    ([("I", "PRON", "PRP", "nsubj", 3), ("do", "AUX", "VBP", "aux", 3),
+      ("not", "PART", "RB", "neg", 3), ("want", "VERB", "VB", "ROOT", 3),
+      ("any", "DET", "DT", "det", 5), ("bugs", "NOUN", "NNS", "dobj", 3),
+      ("in", "ADP", "IN", "prep", 5), ("the", "DET", "DT", "det", 8),
+      ("code", "NOUN", "NN", "pobj", 6)],
+     None, "I do not want any bugs in code"),
+    # "a few" keeps its article; restrictive and contrastive adverbs are kept
+    ([("list", "VERB", "VB", "ROOT", 0), ("a", "DET", "DT", "det", 2),
+      ("few", "ADJ", "JJ", "amod", 3), ("options", "NOUN", "NNS", "dobj", 0)],
+     None, "list a few options"),
+    ([("add", "VERB", "VB", "ROOT", 0), ("a", "DET", "DT", "det", 2),
+      ("little", "ADJ", "JJ", "dobj", 0), ("salt", "NOUN", "NN", "npadvmod", 0)],
+     None, "add a little salt"),
+    ([("use", "VERB", "VB", "ROOT", 0), ("A", "PROPN", "NNP", "dobj", 0),
+      ("rather", "ADV", "RB", "advmod", 3), ("than", "ADP", "IN", "prep", 0),
+      ("B", "PROPN", "NNP", "pobj", 3)],
+     None, "use A rather than B"),
+    ([("list", "VERB", "VB", "ROOT", 0), ("just", "ADV", "RB", "advmod", 3),
+      ("the", "DET", "DT", "det", 3), ("names", "NOUN", "NNS", "dobj", 0)],
+     None, "list just names"),
+])
+def test_compress_doc(tokens, entities, expected):
+    '''Low-information tokens are dropped from a parsed document.'''
+    assert TextOptimizer().compress_doc(make_doc(tokens, entities)) == expected
+
+
+@pytest.mark.skipif(not HAS_MODEL, reason="en_core_web_sm is not installed")
+@pytest.mark.parametrize("text, kept, dropped", [
+    ("Is this safe?", {"this", "safe"}, set()),
+    ("Explain the error in Python 3.12", {"error", "Python", "3.12"}, {"the"}),
+    ("I do not really like the long answers", {"not", "answers"}, {"really"}),
+    ("Well, tell me about Paris in 1889", {"Paris", "1889"}, {"Well"}),
+])
+def test_compress_batch_with_model(text, kept, dropped):
+    '''The real pipeline keeps entities, numbers, negation and demonstratives.'''
+    compressed = TextOptimizer(linguistic_compression=True).compress_batch([text])[0]
+    words = set(re.findall(r"\w+(?:\.\w+)*", compressed))
+    assert kept <= words
+    assert not dropped & words
+
+
+def test_phrase_file_is_hot_reloaded(tmp_path, monkeypatch):
+    '''Editing the phrase file swaps in new tables on the next optimize_text call.'''
+    phrases = tmp_path / "phrases_to_remove.txt"
+    phrases.write_text("kindly\n", encoding="utf-8")
+    monkeypatch.setattr(sustain, "PHRASES_PATH", str(phrases))
+    monkeypatch.setattr(SharedResources, "PHRASE_RELOAD_INTERVAL", 0)
+    monkeypatch.setattr(SharedResources, "_phrase_tables", None)
+    optimizer = TextOptimizer()
+    assert optimizer.optimize_text("kindly explain it please") == "explain it please"
+
+    phrases.write_text("kindly\nplease\n", encoding="utf-8")
+    os.utime(phrases, (1, 1))
+    assert optimizer.optimize_text("kindly explain it please") == "explain it"
+
+
+def test_chunked_optimization_matches_unchunked():
+    '''Large inputs optimized in chunks give the same result as one pass.'''
+    sentence = ("Hello, could you kindly tell me what is not working? I am sure it is not "
+                "the cache. Thank you!\nPlease explain why you are not done ")
+    text = sentence * 200
+    chunked = TextOptimizer(chunk_chars=64)
+    unchunked = TextOptimizer(chunk_chars=len(text))
+    assert chunked.optimize_text(text) == unchunked.optimize_text(text)
+
+
+@pytest.mark.parametrize("text, size", [
+    ("abc def. ghi\njkl " * 100, 50),
+    ("a" * 1050, 100),
+    ("one sentence without a break " * 20, 40),
+])
+def test_iter_chunks_round_trips(text, size):
+    '''Chunks always concatenate back to the original text.'''
+    assert ''.join(sustain.iter_chunks(text, size)) == text
+    assert ''.join(sustain.iter_chunks(text, size, sustain.SENTENCE_SEPARATORS,
+                                       hard_split=False)) == text
+
+
+def baseline_optimize_text(text):
+    '''The original per-phrase loop that PhraseTables must reproduce exactly.'''
+    for phrase in TextOptimizer.load_phrases_to_remove():
+        text = re.sub(r'\b' + re.escape(phrase) + r'\b', '', text, flags=re.IGNORECASE)
+    for phrase, contraction in TextOptimizer.load_contractions().items():
+        text = re.sub(r'\b' + re.escape(phrase) + r'\b', contraction, text, flags=re.IGNORECASE)
+    return ' '.join(text.split()).strip()
+
+
+@pytest.mark.parametrize("text", [
+    "Can you explain to me how neural networks work?",
+    "explain to me",
+    "I am sure it is not what you are thinking, and I cannot do it",
+    "Hello, could you kindly tell me what is the capital of France? Thank you",
+])
+def test_optimize_text_matches_per_phrase_loop(text, monkeypatch):
+    '''Phrase precedence follows file order, as in the original loop.'''
+    monkeypatch.setattr(SharedResources, "_phrase_tables", None)
+    assert TextOptimizer().optimize_text(text) == baseline_optimize_text(text)
+
+
+def test_optimize_text_matches_per_phrase_loop_on_random_mixes(monkeypatch):
+    '''Random mixes of phrases, contractions and words match the original loop.'''
+    monkeypatch.setattr(SharedResources, "_phrase_tables", None)
+    rng = random.Random(0)
+    vocabulary = ([phrase for phrase in TextOptimizer.load_phrases_to_remove() if phrase]
+                  + list(TextOptimizer.load_contractions())
+                  + ["explain", "how", "networks", "work", "me", "to", "is", "not", "?", ","])
+    optimizer = TextOptimizer()
+    for _ in range(2000):
+        text = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 12)))
+        assert optimizer.optimize_text(text) == baseline_optimize_text(text), text